@@ -2,14 +2,16 @@ import importlib, subprocess
 
 packages = [
     "boto3",
-    "pytesseract",
-    "pdf2image",
+    "tesserocr",
+    "fitz",       # comes from PyMuPDF
     "PIL",
     "pandas",
     "numpy",
     "spacy",
     "cv2",        # comes from opencv-python
-    "PyPDF2",
+    "orjson",
+    "httpx",
+    "ijson",
     "pytest"
 ]
 
@@ -1,13 +1,14 @@
 # main.py
 
 from src.pipeline.pipeline_runner import run_pipeline
-from src.utils.config import ENABLE_GEMINI, ENABLE_SHEETS_EXPORT
+from src.utils.config import ENABLE_GEMINI, ENABLE_SHEETS_EXPORT, ensure_paths
 from src.utils.logger import get_logger
 
 logger = get_logger("main")
 
 def main():
     logger.info("🚀 Starting AIDP_StormData pipeline")
+    ensure_paths()
 
     # STEP 1 — OCR + Page Filtering
     run_pipeline()
@@ -6,7 +6,7 @@ Google Sheets Exporter for AIDP_StormData
 Reads all JSON files in data/processed/
 Flattens "storm_events" list into rows
 Adds month/year extracted from filename
-Appends rows into a Google Sheet
+Appends rows from all files into a Google Sheet in batched calls
 Moves processed JSON files → data/archived_processed/
 
 Run standalone:
@@ -14,12 +14,17 @@ Run standalone:
 """
 
 import os
-import json
+import re
+import mmap
 import shutil
+import time
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 
 import gspread
+import pandas as pd
+import orjson
 from google.oauth2.service_account import Credentials
 
 from src.utils.logger import get_logger
@@ -31,6 +36,8 @@ from src.utils.config import (
 
 log = get_logger("sheets_exporter")
 
+_DIGIT_RE = re.compile(r"\d+")
+
 # ---------------------- CLEANING HELPERS ----------------------
 def clean_numeric(val):
     """
@@ -51,10 +58,9 @@ def clean_numeric(val):
         val = val[1:]
 
     # Extract first numeric sequence only
-    import re
-    digits = re.findall(r"\d+", val)
+    m = _DIGIT_RE.search(val)
 
-    return digits[0] if digits else ""
+    return m.group() if m else ""
 
 def clean_date(val):
     """
@@ -72,14 +78,13 @@ def clean_date(val):
     if val.startswith("'"):
         val = val[1:]
 
-    import re
-    digits = re.findall(r"\d+", val)
+    m = _DIGIT_RE.search(val)
 
-    if not digits:
+    if not m:
         return ""
 
     # Only return the FIRST numeric chunk
-    return digits[0][:2]   # ensures “09-12” → “09”
+    return m.group()[:2]   # ensures “09-12” → “09”
 
 
 # --------------------------
@@ -87,20 +92,50 @@ def clean_date(val):
 # --------------------------
 
 ARCHIVED_PROCESSED_PATH = Path("data/archived_processed")
-ARCHIVED_PROCESSED_PATH.mkdir(parents=True, exist_ok=True)
 
 SCOPES = [
     "https://www.googleapis.com/auth/spreadsheets",
     "https://www.googleapis.com/auth/drive"
 ]
 
+# Storm event fields, in sheet column order
+EVENT_COLUMNS = [
+    "state",
+    "place_or_location",
+    "date",
+    "time",
+    "path_length",
+    "path_width",
+    "killed",
+    "injured",
+    "property_damage_code",
+    "crop_damage_code",
+    "character_of_storm",
+    "description",
+]
+
+NUMERIC_COLUMNS = [
+    "path_length",
+    "path_width",
+    "killed",
+    "injured",
+    "property_damage_code",
+    "crop_damage_code",
+]
+
+SHEET_COLUMNS = ["month", "year", *EVENT_COLUMNS, "file_name", "idx"]
+
+APPEND_BATCH_SIZE = 5000  # rows per append_rows call (keeps payloads small)
+APPEND_MAX_ATTEMPTS = 5    # retries on Sheets quota errors (HTTP 429)
+
 
 # --------------------------
 # LOAD GOOGLE SHEET CLIENT
 # --------------------------
 
+@lru_cache(maxsize=1)
 def load_google_sheet():
-    """Authenticate service account and return the worksheet."""
+    """Authenticate service account and return the worksheet (cached per process)."""
     try:
         creds = Credentials.from_service_account_file(
             SERVICE_ACCOUNT_PATH,
@@ -116,6 +151,22 @@ def load_google_sheet():
         raise
 
 
+def append_with_retry(worksheet, rows: List[List[Any]]):
+    """
+    Append rows, backing off exponentially on quota errors (HTTP 429).
+    Any other error, or running out of attempts, is raised to the caller.
+    """
+    for attempt in range(APPEND_MAX_ATTEMPTS):
+        try:
+            return worksheet.append_rows(rows, value_input_option="USER_ENTERED")
+        except gspread.exceptions.APIError as e:
+            if e.response.status_code != 429 or attempt == APPEND_MAX_ATTEMPTS - 1:
+                raise
+            wait = 2 ** attempt
+            log.warning(f"⏳ Sheets quota hit (429), retrying in {wait} sec...")
+            time.sleep(wait)
+
+
 # --------------------------
 # FILE HELPERS
 # --------------------------
@@ -133,70 +184,54 @@ def extract_month_year(file_name: str) -> (str, str):
     return "", ""
 
 
-def flatten_event(event: Dict[str, Any], month: str, year: str, file_name: str, idx: int) -> List[str]:
+def events_to_rows(events: List[Dict[str, Any]], month: str, year: str, file_name: str) -> List[List[str]]:
     """
-    Convert a single storm_event dict → list (row).
+    Convert a file's storm_events → list of rows, column by column.
     Preserves column order exactly as your sheet headers.
     """
-    return [
-        month,
-        year,
-        event.get("state", ""),
-        event.get("place_or_location", ""),
-
-        clean_date(event.get("date", "")),
-        event.get("time", ""),
-
-        clean_numeric(event.get("path_length", "")),
-        clean_numeric(event.get("path_width", "")),
-        clean_numeric(event.get("killed", "")),
-        clean_numeric(event.get("injured", "")),
-        clean_numeric(event.get("property_damage_code", "")),
-        clean_numeric(event.get("crop_damage_code", "")),
-
-        event.get("character_of_storm", ""),
-        event.get("description", ""),
-        file_name,
-        idx
-    ]
-
-    # return [
-    #     month,
-    #     year,
-    #     event.get("state", ""),
-    #     event.get("place_or_location", ""),
-    #     event.get("date", ""),
-    #     event.get("time", ""),
-    #     event.get("path_length", ""),
-    #     event.get("path_width", ""),
-    #     event.get("killed", ""),
-    #     event.get("injured", ""),
-    #     event.get("property_damage_code", ""),
-    #     event.get("crop_damage_code", ""),
-    #     event.get("character_of_storm", ""),
-    #     event.get("description", ""),
-    #     file_name,
-    #     idx  # page/row index for debugging/auditing
-    # ] 
+    # Gemini output is untrusted: a non-dict entry would make pandas lay
+    # out every event as a single column and blank out all fields
+    valid = [e for e in events if isinstance(e, dict)]
+    if len(valid) < len(events):
+        log.warning(f"⚠️ Skipped {len(events) - len(valid)} non-object storm_events entries in {file_name}")
+    if not valid:
+        return []
+
+    df = pd.DataFrame(valid, dtype=object).reindex(columns=EVENT_COLUMNS).fillna("")
+
+    df["date"] = df["date"].map(clean_date)
+    for col in NUMERIC_COLUMNS:
+        df[col] = df[col].map(clean_numeric)
+
+    df.insert(0, "year", year)
+    df.insert(0, "month", month)
+    df["file_name"] = file_name
+    df["idx"] = range(1, len(df) + 1)  # page/row index for debugging/auditing
+
+    return df[SHEET_COLUMNS].astype(str).values.tolist()
 
 
 # --------------------------
 # MAIN PROCESSOR
 # --------------------------
 
-def process_json_file(json_path: Path, worksheet):
+def process_json_file(json_path: Path) -> Optional[List[List[Any]]]:
     """
-    Read one processed JSON file, write rows to Google Sheets, archive JSON.
+    Read one processed JSON file and build its rows for Google Sheets.
+    Returns None if the file could not be read or is malformed.
     """
     file_name = json_path.name
     log.info(f"➡️ Processing JSON: {file_name}")
 
     try:
-        with open(json_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        # Parse straight from the memory-mapped file (no intermediate copy)
+        with open(json_path, "rb") as f, \
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                memoryview(mm) as view:
+            data = orjson.loads(view)
     except Exception as e:
         log.error(f"❌ Failed reading {file_name}: {e}")
-        return
+        return None
 
     # Extract month/year from filename
     month, year = extract_month_year(file_name)
@@ -204,29 +239,23 @@ def process_json_file(json_path: Path, worksheet):
     events = data.get("storm_events", [])
     if not isinstance(events, list):
         log.error(f"❌ Invalid JSON format in {file_name} — missing storm_events list")
-        return
+        return None
 
     # Build rows
-    rows_to_insert = []
-    for idx, event in enumerate(events, start=1):
-        row = flatten_event(event, month, year, file_name, idx)
-        rows_to_insert.append(row)
+    rows_to_insert = events_to_rows(events, month, year, file_name)
+
+    log.info(f"🧱 Built {len(rows_to_insert)} rows from {file_name}")
+    return rows_to_insert
 
-    # Append to Google Sheet
-    try:
-        worksheet.append_rows(rows_to_insert, value_input_option="USER_ENTERED")
-        log.info(f"✅ Appended {len(rows_to_insert)} rows from {file_name}")
-    except Exception as e:
-        log.error(f"❌ Failed appending rows for {file_name}: {e}")
-        return
 
-    # Move processed JSON to archive
+def archive_json_file(json_path: Path):
+    """Move an exported JSON file into data/archived_processed/."""
     try:
-        archived_path = ARCHIVED_PROCESSED_PATH / file_name
+        archived_path = ARCHIVED_PROCESSED_PATH / json_path.name
         shutil.move(str(json_path), str(archived_path))
         log.info(f"📦 Archived JSON → {archived_path}")
     except Exception as e:
-        log.error(f"❌ Failed archiving JSON file {file_name}: {e}")
+        log.error(f"❌ Failed archiving JSON file {json_path.name}: {e}")
 
 
 # --------------------------
@@ -239,6 +268,7 @@ def run_google_sheets_exporter():
 
     processed_dir = Path(LOCAL_PROCESSED_PATH)
     processed_dir.mkdir(parents=True, exist_ok=True)
+    ARCHIVED_PROCESSED_PATH.mkdir(parents=True, exist_ok=True)
 
     worksheet = load_google_sheet()
 
@@ -249,8 +279,36 @@ def run_google_sheets_exporter():
 
     log.info(f"📌 Found {len(json_files)} JSON file(s) to export")
 
+    # Build rows for every file first, so the sheet is hit once per batch.
+    # Batches are cut on file boundaries, so each file's rows are committed
+    # in a single call (a file larger than APPEND_BATCH_SIZE gets its own).
+    batches = []  # [(files, rows)]
+    batch_files, batch_rows = [], []
     for json_path in json_files:
-        process_json_file(json_path, worksheet)
+        rows = process_json_file(json_path)
+        if rows is None:
+            continue
+        if batch_files and len(batch_rows) + len(rows) > APPEND_BATCH_SIZE:
+            batches.append((batch_files, batch_rows))
+            batch_files, batch_rows = [], []
+        batch_files.append(json_path)
+        batch_rows.extend(rows)
+    if batch_files:
+        batches.append((batch_files, batch_rows))
+
+    # Append each batch, archiving its files right after it is committed
+    for num, (files, rows) in enumerate(batches, start=1):
+        try:
+            if rows:
+                append_with_retry(worksheet, rows)
+            log.info(f"✅ Appended {len(rows)} rows from {len(files)} file(s) (batch {num}/{len(batches)})")
+        except Exception as e:
+            log.error(f"❌ Failed appending rows: {e}")
+            log.error("⏭ Remaining JSON files not archived — they will be retried on the next run.")
+            return
+
+        for json_path in files:
+            archive_json_file(json_path)
 
     log.info("🏁 Google Sheet export completed successfully.")
 
@@ -3,22 +3,34 @@
 Final Gemini Extractor With Safe Continuation Detection
 -------------------------------------------------------
 - OCRs pages in sorted order for each document folder
+  (reusing OCR text the pipeline already cached under logs/ocr_text/)
 - Detects if a page is continuation of previous page using heuristics
 - Inserts markers to help Gemini merge multi-page rows
 - Calls Gemini (your model), with retry + skip safe mode
+- Overlaps OCR of one document with Gemini calls for others (asyncio)
+- Batches small documents into one Gemini call (~30k tokens max)
 - Produces ONE JSON per document (folder)
 - Moves raw folder → archived_raw
 """
 
-import os, io, json, time, shutil, requests
+import os, io, re, shutil, asyncio
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, List
-from pdf2image import convert_from_path
-from PIL import Image, ImageOps, ImageFilter
-import pytesseract
+from typing import Dict, Any, List, Optional, Tuple
+import orjson
+import httpx
+import ijson
 
+from src.ingestion.ocr_engine import extract_page_text
 from src.utils.logger import get_logger
-from src.utils.config import GEMINI_API_KEY, LOCAL_RAW_PATH, LOCAL_PROCESSED_PATH
+from src.utils.config import (
+    GEMINI_API_KEY,
+    GEMINI_CONCURRENCY,
+    LOCAL_RAW_PATH,
+    LOCAL_PROCESSED_PATH,
+    OCR_TEXT_PATH,
+    OCR_WORKERS,
+)
 
 log = get_logger("gemini_extractor")
 
@@ -27,24 +39,17 @@ MODEL_URL = (
     "gemini-2.5-flash-lite:generateContent"
 )
 
+# Several small documents share one Gemini call up to this many prompt tokens
+GEMINI_BATCH_TOKENS = 30_000
+
 # ============================================================
-# OCR PREPROCESSING
+# OCR
 # ============================================================
 
-def preprocess_image(img):
-    gray = ImageOps.grayscale(img)
-    sharpened = gray.filter(ImageFilter.UnsharpMask(radius=1.5, percent=150, threshold=2))
-    bw = sharpened.point(lambda x: 255 if x > 185 else 0)
-    return bw
-
 def ocr_page(pdf_path: Path) -> str:
-    """Extracts OCR text from a single-page PDF."""
+    """Extracts OCR text from a single-page PDF (uses its text layer if present)."""
     try:
-        images = convert_from_path(str(pdf_path), dpi=300)
-        if not images:
-            return ""
-        processed = preprocess_image(images[0])
-        return pytesseract.image_to_string(processed, config="--oem 1 --psm 6")
+        return extract_page_text(pdf_path)
     except Exception as e:
         log.error(f"OCR failed for {pdf_path.name}: {e}")
         return ""
@@ -60,6 +65,9 @@ HEADER_KEYWORDS = [
     "damage", "property", "crops", "character"
 ]
 
+# Single case-insensitive pass over the page instead of one scan per keyword
+_HEADER_RE = re.compile("|".join(re.escape(h) for h in HEADER_KEYWORDS), re.IGNORECASE)
+
 def is_continuation(curr_text: str, prev_text: str) -> bool:
     """
     Detect if current page is continuation of previous page.
@@ -77,16 +85,18 @@ def is_continuation(curr_text: str, prev_text: str) -> bool:
     if not prev:
         return False  # first page
 
-    # Signal 1 — no headers on current page
-    if not any(h in curr.lower() for h in HEADER_KEYWORDS):
+    # Signal 1 — no headers on current page (also covers an empty page)
+    if _HEADER_RE.search(curr) is None:
         return True
 
+    first = curr[0]
+
     # Signal 2 — starts with numbers (row continuation)
-    if curr[:1].isdigit():
+    if first.isdigit():
         return True
 
     # Signal 3 — starts with lowercase letter (continuation of a sentence)
-    if curr[:1].islower():
+    if first.islower():
         return True
 
     # Signal 4 — previous page ends mid-sentence
@@ -100,17 +110,27 @@ def is_continuation(curr_text: str, prev_text: str) -> bool:
 # BUILD COMBINED OCR WITH CONTINUATION MARKERS
 # ============================================================
 
-def build_combined_ocr_text(folder: Path) -> str:
-    """Combines OCR of all pages with CONTINUATION markers."""
-    page_files = sorted(folder.glob("*.pdf"), key=lambda p: int(p.stem.split("_pg")[-1]))
+def sorted_page_files(folder: Path) -> List[Path]:
+    """Page PDFs of a document folder in page-number order."""
+    return sorted(folder.glob("*.pdf"), key=lambda p: int(p.stem.split("_pg")[-1]))
+
 
+def cached_ocr_text(page_pdf: Path) -> Optional[str]:
+    """OCR text the pipeline saved for this page, or None if not cached."""
+    cached = Path(OCR_TEXT_PATH) / page_pdf.parent.name / f"{page_pdf.stem}.txt"
+    try:
+        return cached.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        return None
+
+
+def combine_page_texts(page_files: List[Path], texts: List[str]) -> str:
+    """Combines already-OCR'd pages (in page order) with CONTINUATION markers."""
     combined = []
     prev_text = ""
 
-    for idx, page_pdf in enumerate(page_files, start=1):
-        log.info(f"📝 OCR page {idx}: {page_pdf.name}")
-        curr_text = ocr_page(page_pdf)
-
+    # Continuation detection depends on page order, so it stays serial
+    for idx, (page_pdf, curr_text) in enumerate(zip(page_files, texts), start=1):
         if not curr_text.strip():
             log.warning(f"⚠️ Empty OCR for {page_pdf.name}")
             continue
@@ -128,6 +148,27 @@ def build_combined_ocr_text(folder: Path) -> str:
     return "\n".join(combined).strip()
 
 
+async def build_combined_ocr_text(folder: Path, pool: ProcessPoolExecutor) -> str:
+    """OCRs all pages of a folder in the process pool and combines them."""
+    page_files = sorted_page_files(folder)
+
+    # OCR is CPU-bound, so pages run in worker processes while the event
+    # loop keeps other documents' Gemini calls progressing
+    log.info(f"📝 OCR {len(page_files)} page(s) for {folder.name}")
+    loop = asyncio.get_running_loop()
+
+    async def page_text(page_pdf: Path) -> str:
+        cached = cached_ocr_text(page_pdf)
+        if cached is not None:
+            log.info(f"♻️ Reusing cached OCR text for {page_pdf.name}")
+            return cached
+        return await loop.run_in_executor(pool, ocr_page, page_pdf)
+
+    texts = await asyncio.gather(*(page_text(page_pdf) for page_pdf in page_files))
+
+    return combine_page_texts(page_files, texts)
+
+
 # ============================================================
 # GEMINI CALL
 # ============================================================
@@ -170,10 +211,97 @@ Document text:
 {text}
 """
 
-def gemini_extract(doc_name: str, ocr_text: str) -> Dict[str, Any]:
-    """Calls Gemini with retry + safe fallback."""
+def gemini_client() -> httpx.AsyncClient:
+    """
+    One shared HTTP/2 client per extractor run. Every Gemini call (and
+    retry) reuses its pooled keep-alive connection instead of paying a new
+    TCP + TLS handshake.
+    """
+    return httpx.AsyncClient(
+        http2=True,
+        timeout=180,
+        limits=httpx.Limits(
+            max_connections=GEMINI_CONCURRENCY,
+            max_keepalive_connections=GEMINI_CONCURRENCY,
+        ),
+    )
+
+def build_batch_prompt(docs: List[Tuple[str, str]]) -> str:
+    doc_blocks = "\n".join(f"--- DOC: {name} ---\n{text}\n" for name, text in docs)
+    return f"""
+You are an expert extracting structured storm data from NOAA storm reports.
+
+You are given {len(docs)} separate documents. Each one starts with a
+'--- DOC: <doc_name> ---' marker. Extract each document independently and
+NEVER mix storm events between documents.
+
+IMPORTANT:
+- When you see the marker '--- CONTINUED FROM PREVIOUS PAGE ---',
+  that text is a continuation of the SAME storm event row.
+  DO NOT create a new JSON entry for it.
+
+- Merge continuation text into the previous event.
+
+Extract only valid structured JSON, with one entry per document:
+{{
+  "docs": [
+    {{
+      "doc_name": "",
+      "month": "",
+      "year": "",
+      "storm_events": [
+         {{
+            "state": "",
+            "place_or_location": "",
+            "date": "",
+            "time": "",
+            "path_length": "",
+            "path_width": "",
+            "killed": "",
+            "injured": "",
+            "property_damage_code": "",
+            "crop_damage_code": "",
+            "character_of_storm": "",
+            "description": ""
+         }}
+      ]
+    }}
+  ]
+}}
+
+Documents:
+{doc_blocks}
+"""
+
+def estimate_tokens(text: str) -> int:
+    """Rough Gemini token estimate (~4 characters per token)."""
+    return len(text) // 4
+
+def failed_extraction() -> Dict[str, Any]:
+    """Fallback result when Gemini still fails after retries."""
+    return {
+        "month": "",
+        "year": "",
+        "storm_events": [],
+        "error": "Gemini extraction failed after retries"
+    }
+
+async def stream_response_text(r: httpx.Response) -> str:
+    """
+    Incrementally parses a streamed Gemini response as bytes arrive,
+    keeping only the generated text parts instead of the full body.
+    """
+    parts = ijson.sendable_list()
+    coro = ijson.items_coro(parts, "candidates.item.content.parts.item.text")
+    async for chunk in r.aiter_bytes():
+        coro.send(chunk)
+    coro.close()
+    return "".join(parts)
+
+async def call_gemini(client: httpx.AsyncClient, prompt: str, label: str) -> Optional[Any]:
+    """POSTs one prompt to Gemini with retry; returns the parsed JSON or None."""
     payload = {
-        "contents": [{"parts": [{"text": build_prompt(ocr_text, doc_name)}]}],
+        "contents": [{"parts": [{"text": prompt}]}],
         "generationConfig": {
             "responseMimeType": "application/json",
             "temperature": 0.1
@@ -182,53 +310,71 @@ def gemini_extract(doc_name: str, ocr_text: str) -> Dict[str, Any]:
 
     for attempt in range(1, 3):  # 2 retries
         try:
-            log.info(f"📡 Gemini API call attempt {attempt} for {doc_name}")
-            r = requests.post(
-                f"{MODEL_URL}?key={GEMINI_API_KEY}",
-                json=payload,
-                timeout=180
-            )
-            r.raise_for_status()
-            txt = r.json()["candidates"][0]["content"]["parts"][0]["text"]
+            log.info(f"📡 Gemini API call attempt {attempt} for {label}")
+            async with client.stream("POST", f"{MODEL_URL}?key={GEMINI_API_KEY}", json=payload) as r:
+                r.raise_for_status()
+                txt = await stream_response_text(r)
             cleaned = txt.strip().removeprefix("```json").removesuffix("```").strip()
-            return json.loads(cleaned)
+            return orjson.loads(cleaned)
 
         except Exception as e:
             log.error(f"Gemini error: {e}")
             if attempt == 1:
                 log.info("⏳ Waiting 80 sec before retry...")
-                time.sleep(80)
+                await asyncio.sleep(80)
 
-    # Final fallback if Gemini still fails
-    return {
-        "month": "",
-        "year": "",
-        "storm_events": [],
-        "error": "Gemini extraction failed after retries"
-    }
+    return None
+
+async def gemini_extract(client: httpx.AsyncClient, doc_name: str, ocr_text: str) -> Dict[str, Any]:
+    """Calls Gemini for one document with retry + safe fallback."""
+    result = await call_gemini(client, build_prompt(ocr_text, doc_name), doc_name)
+    return result if result is not None else failed_extraction()
+
+async def gemini_extract_batch(
+    client: httpx.AsyncClient, docs: List[Tuple[str, str]]
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Calls Gemini once for several (doc_name, ocr_text) documents.
+    Returns results keyed by doc_name for the documents the reply matched
+    by name; missing, renamed or malformed documents are left out.
+    Returns None if the call itself failed (no parseable reply).
+    """
+    names = [name for name, _ in docs]
+    result = await call_gemini(client, build_batch_prompt(docs), ", ".join(names))
+
+    entries = result.get("docs") if isinstance(result, dict) else None
+    if not isinstance(entries, list):
+        return None
+
+    extracted = {}
+    for entry in entries:
+        if (
+            isinstance(entry, dict)
+            and entry.get("doc_name") in names
+            and entry["doc_name"] not in extracted
+            and isinstance(entry.get("storm_events"), list)
+        ):
+            extracted[entry["doc_name"]] = {k: v for k, v in entry.items() if k != "doc_name"}
+
+    return extracted
 
 
 # ============================================================
 # PER DOCUMENT PROCESSING
 # ============================================================
 
-def extract_from_raw_folder(doc_folder: Path):
+def save_extraction(doc_folder: Path, structured: Dict[str, Any], archive: bool = True):
+    """
+    Writes one document's JSON to processed/ and archives its raw folder.
+    With archive=False the raw folder stays in raw/ for the next run.
+    """
     doc_name = doc_folder.name
 
-    log.info("\n========================================")
-    log.info(f"➡️ Starting extraction for {doc_name}")
-    log.info("========================================")
-
-    ocr_text = build_combined_ocr_text(doc_folder)
-    log.info(f"✅ Combined OCR text built for {doc_name}")
-
     # Parse month/year for final JSON
     parts = doc_name.split("_")
     month = parts[0].capitalize()
     year = parts[1] if len(parts) > 1 else ""
 
-    structured = gemini_extract(doc_name, ocr_text)
-
     # Insert month/year for DynamoDB use
     structured["month"] = month
     structured["year"] = year
@@ -236,11 +382,13 @@ def extract_from_raw_folder(doc_folder: Path):
     out_json = Path(LOCAL_PROCESSED_PATH) / f"{doc_name}.json"
     out_json.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(out_json, "w", encoding="utf-8") as f:
-        json.dump(structured, f, indent=2)
+    out_json.write_bytes(orjson.dumps(structured, option=orjson.OPT_INDENT_2))
 
     log.info(f"✅ JSON saved → {out_json}")
 
+    if not archive:
+        return
+
     # Archive the raw folder
     archive_dir = Path("data/archived_raw") / doc_name
     archive_dir.parent.mkdir(parents=True, exist_ok=True)
@@ -251,12 +399,52 @@ def extract_from_raw_folder(doc_folder: Path):
     shutil.move(str(doc_folder), str(archive_dir))
     log.info(f"📦 Archived raw folder → {archive_dir}")
 
+    # The document is done, so its cached page OCR text is no longer needed
+    shutil.rmtree(Path(OCR_TEXT_PATH) / doc_name, ignore_errors=True)
+
+
+async def extract_batch(
+    batch: List[Tuple[Path, str]],
+    client: httpx.AsyncClient,
+    gemini_slots: asyncio.Semaphore,
+):
+    """Runs one Gemini call for a batch of OCR'd folders and saves each result."""
+    docs = [(folder.name, ocr_text) for folder, ocr_text in batch]
+
+    log.info("\n========================================")
+    log.info(f"➡️ Starting extraction for {[name for name, _ in docs]}")
+    log.info("========================================")
+
+    async with gemini_slots:
+        if len(docs) == 1:
+            doc_name, ocr_text = docs[0]
+            results = {doc_name: await gemini_extract(client, doc_name, ocr_text)}
+        else:
+            results = await gemini_extract_batch(client, docs)
+
+            if results is None:
+                # The batch call itself failed (e.g. quota): don't fan out into
+                # N more calls; keep raw folders so the next run retries them
+                log.error(f"❌ Gemini batch failed; leaving {[name for name, _ in docs]} in raw/")
+                for folder, _ in batch:
+                    save_extraction(folder, failed_extraction(), archive=False)
+                return
+
+            # Retry documents the parsed reply missed, one at a time
+            for doc_name, ocr_text in docs:
+                if doc_name not in results:
+                    log.warning(f"⚠️ No batch result for {doc_name}, retrying on its own")
+                    results[doc_name] = await gemini_extract(client, doc_name, ocr_text)
+
+    for folder, _ in batch:
+        save_extraction(folder, results[folder.name])
+
 
 # ============================================================
 # MAIN
 # ============================================================
 
-def run_gemini_extractor():
+async def run_gemini_extractor_async():
     raw_root = Path(LOCAL_RAW_PATH)
     raw_root.mkdir(parents=True, exist_ok=True)
 
@@ -269,8 +457,47 @@ def run_gemini_extractor():
 
     log.info(f"📌 Found {len(folders)} document folder(s): {[f.name for f in folders]}")
 
-    for folder in folders:
-        extract_from_raw_folder(folder)
+    # OCR for all folders shares one process pool. As each folder's text is
+    # ready it joins the current batch; a full batch goes to Gemini right
+    # away, with at most GEMINI_CONCURRENCY requests in flight at any time
+    gemini_slots = asyncio.Semaphore(GEMINI_CONCURRENCY)
+
+    with ProcessPoolExecutor(max_workers=OCR_WORKERS) as pool:
+        async with gemini_client() as client:
+            ocr_tasks = [asyncio.create_task(build_combined_ocr_text(f, pool)) for f in folders]
+
+            batch_tasks = []
+            batch, batch_tokens = [], 0
+            for folder, ocr_task in zip(folders, ocr_tasks):
+                try:
+                    ocr_text = await ocr_task
+                except Exception as e:
+                    log.error(f"❌ OCR failed for {folder.name}: {e}")
+                    continue
+                log.info(f"✅ Combined OCR text built for {folder.name}")
+
+                tokens = estimate_tokens(ocr_text)
+                if batch and batch_tokens + tokens > GEMINI_BATCH_TOKENS:
+                    batch_tasks.append(asyncio.create_task(extract_batch(batch, client, gemini_slots)))
+                    batch, batch_tokens = [], 0
+
+                batch.append((folder, ocr_text))
+                batch_tokens += tokens
+
+            if batch:
+                batch_tasks.append(asyncio.create_task(extract_batch(batch, client, gemini_slots)))
+
+            results = await asyncio.gather(*batch_tasks, return_exceptions=True)
+
+    for result in results:
+        if isinstance(result, Exception):
+            log.error(f"❌ Extraction failed: {result}")
+
+
+def run_gemini_extractor():
+    """Sync entry point (used by main.py and standalone runs)."""
+    asyncio.run(run_gemini_extractor_async())
+
 
 if __name__ == "__main__":
     if not GEMINI_API_KEY:
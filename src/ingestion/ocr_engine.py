@@ -0,0 +1,106 @@
+# src/ingestion/ocr_engine.py
+"""
+Shared page-level OCR used by the pipeline and the Gemini extractor.
+
+Two OCR flavours, kept exactly as each stage was tuned:
+- scoring_page_text: plain grayscale at 200 dpi, automatic page layout
+  (what THRESHOLD in pipeline_runner was tuned on)
+- extract_page_text: 300 dpi, grayscale → sharpening → black/white threshold,
+  single text block (what Gemini extraction reads)
+
+Both try the PDF text layer first, so pages with real text skip OCR entirely.
+Tesseract runs in-process (tesserocr), one engine per mode per process.
+"""
+
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import fitz  # PyMuPDF
+from PIL import Image, ImageOps, ImageFilter
+import tesserocr
+
+MIN_TEXT_LAYER_CHARS = 40  # below this, the PDF text layer is treated as missing
+
+SCORING_DPI = 200
+EXTRACT_DPI = 300
+
+BW_THRESHOLD = 185  # grayscale cutoff for black/white conversion (tuned at 300 dpi)
+# Precomputed 256-entry lookup table, applied by PIL in C
+_BW_LUT = [255 if i > BW_THRESHOLD else 0 for i in range(256)]
+
+_TESS_APIS: Dict[Tuple[int, int], tesserocr.PyTessBaseAPI] = {}
+
+
+def tess_api(
+    psm: int = tesserocr.PSM.AUTO,
+    oem: int = tesserocr.OEM.DEFAULT,
+) -> tesserocr.PyTessBaseAPI:
+    """
+    In-process Tesseract engine for the given page-segmentation / engine
+    mode, created once per (worker) process so language data is loaded
+    once rather than per page.
+    """
+    key = (psm, oem)
+    if key not in _TESS_APIS:
+        _TESS_APIS[key] = tesserocr.PyTessBaseAPI(psm=psm, oem=oem)
+    return _TESS_APIS[key]
+
+
+def text_layer(page: fitz.Page) -> Optional[str]:
+    """Return the page's embedded text if it is usable, else None (needs OCR)."""
+    text = page.get_text("text")
+    if len(text.strip()) > MIN_TEXT_LAYER_CHARS:
+        return text
+    return None
+
+
+def preprocess_image(img):
+    gray = img if img.mode == "L" else ImageOps.grayscale(img)
+    sharpened = gray.filter(ImageFilter.UnsharpMask(radius=1.5, percent=150, threshold=2))
+    bw = sharpened.point(_BW_LUT)
+    return bw
+
+
+def _page_text_or_image(pdf_path: Path, page_index: int, dpi: int):
+    """Return (text_layer, None) if the page has text, else (None, grayscale image)."""
+    with fitz.open(str(pdf_path)) as doc:
+        if page_index >= doc.page_count:
+            return "", None
+        page = doc.load_page(page_index)
+
+        # Fast path — PDF already has a usable text layer, skip OCR
+        text = text_layer(page)
+        if text is not None:
+            return text, None
+
+        # Render straight to grayscale in-process (no Poppler subprocess)
+        pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+
+    return None, Image.frombytes("L", [pix.width, pix.height], pix.samples)
+
+
+def scoring_page_text(pdf_path: Path, page_index: int) -> str:
+    """
+    Text of one PDF page for header scoring (original case).
+    Errors are raised to the caller.
+    """
+    text, img = _page_text_or_image(pdf_path, page_index, SCORING_DPI)
+    if img is None:
+        return text
+    api = tess_api()
+    api.SetImage(img)
+    return api.GetUTF8Text()
+
+
+def extract_page_text(pdf_path: Path, page_index: int = 0) -> str:
+    """
+    Text of one PDF page for Gemini extraction (original case): the text
+    layer if present, otherwise preprocessed single-block OCR.
+    Errors are raised to the caller.
+    """
+    text, img = _page_text_or_image(pdf_path, page_index, EXTRACT_DPI)
+    if img is None:
+        return text
+    api = tess_api(psm=tesserocr.PSM.SINGLE_BLOCK, oem=tesserocr.OEM.LSTM_ONLY)
+    api.SetImage(preprocess_image(img))
+    return api.GetUTF8Text()
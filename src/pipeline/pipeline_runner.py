@@ -5,42 +5,38 @@ Pipeline Runner for AIDP_StormData
 Current Stage (No Gemini yet):
 --------------------------------
 1. Read PDFs from data/input/
-2. Split multi-page PDF → single pages under data/raw/<doc_name>/
-3. OCR each page
-4. Score based on NOAA table headers
-5. KEEP pages with score >= THRESHOLD in raw/
-6. MOVE bad pages to data/error/<doc_name>/
-7. (Optional) Save OCR debug text under logs/ocr_text/<doc_name>/
-8. Move original PDF → data/archived_input/
+2. OCR each page straight from the source PDF (no temp page files)
+3. Score based on NOAA table headers
+4. WRITE pages with score >= THRESHOLD as single-page PDFs to data/raw/<doc_name>/
+5. WRITE bad pages to data/error/<doc_name>/
+6. Save extractor-style OCR text of kept pages under logs/ocr_text/<doc_name>/
+   (reused by Gemini extraction)
+7. Move original PDF → data/archived_input/
 
 This prepares clean pages for tomorrow's Gemini extraction.
 """
-from src.utils.config import SAVE_OCR_DEBUG_TEXT
+import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
 from typing import List, Tuple
 
-from pdf2image import convert_from_path
-from PIL import ImageOps
-import pytesseract
+import fitz  # PyMuPDF
 
 from src.utils.logger import get_logger
 from src.utils.config import (
     LOCAL_INPUT_PATH,
     LOCAL_RAW_PATH,
     LOCAL_ERROR_PATH,
-    SAVE_OCR_DEBUG_TEXT,
+    OCR_TEXT_PATH,
+    OCR_WORKERS,
 )
 
-from src.ingestion.page_splitter import split_pdf_to_pages
+from src.ingestion.ocr_engine import extract_page_text, scoring_page_text
+from src.ingestion.page_splitter import clear_page_files, page_filename, save_page
 
 logger = get_logger("pipeline_runner")
 
-# --------------------------------------
-# CONFIG FLAGS for ocr debug text saving
-# --------------------------------------
-#SAVE_OCR_DEBUG_TEXT = False  # ← set False to stop saving OCR text files
-
-
 # --------------------------------------
 # NOAA KEYWORDS FOR PAGE SCORING
 # --------------------------------------
@@ -58,10 +54,14 @@ HEADER_FIELDS = [
     "property",
     "crops",
     "character",
-    "character of storm",
-    "storm data",
+    "storm",  # covers "character of storm" and "storm data" headers
 ]
 
+# Whole-word matching: "locations" no longer counts as "location".
+# NOAA headers print "(miles)" / "(yards)", so those plurals map to their keyword.
+_KW_TOKENS = {h: h for h in HEADER_FIELDS} | {"miles": "mile", "yards": "yard"}
+_WORD_RE = re.compile(r"[a-z]+")
+
 THRESHOLD = 6  # minimum hits required for keeping page
 
 
@@ -74,30 +74,42 @@ ARCHIVE_INPUT_PATH = Path("data/archived_input")
 # --------------------------------------
 # OCR HELPERS
 # --------------------------------------
-def ocr_page_pdf(page_pdf: Path) -> str:
-    """OCR a single-page PDF → return text."""
+def ocr_pdf_page(pdf_path: Path, page_index: int) -> str:
+    """OCR one page of a (multi-page) PDF in memory for scoring → return text (original case)."""
     try:
-        images = convert_from_path(str(page_pdf), dpi=200)
-        if not images:
-            logger.warning(f"⚠️ No image rendered for {page_pdf.name}")
-            return ""
+        return scoring_page_text(pdf_path, page_index)
+    except Exception as e:
+        logger.error(f"❌ OCR error for {pdf_path.name} page {page_index + 1}: {e}")
+        return ""
 
-        img = images[0]
-        gray = ImageOps.grayscale(img)
-        text = pytesseract.image_to_string(gray)
-        return text.lower()
 
+def extraction_ocr_pdf_page(pdf_path: Path, page_index: int) -> str:
+    """Extractor-style OCR of one page (cached for the Gemini step) → return text."""
+    try:
+        return extract_page_text(pdf_path, page_index)
     except Exception as e:
-        logger.error(f"❌ OCR error for {page_pdf.name}: {e}")
+        logger.error(f"❌ Extraction OCR error for {pdf_path.name} page {page_index + 1}: {e}")
         return ""
 
 
 def score_ocr_text(text: str) -> Tuple[int, List[str]]:
-    """Return (#hits, [matched_keywords])."""
-    hits = [h for h in HEADER_FIELDS if h in text]
+    """Return (#hits, [matched_keywords]) for lowercase OCR text."""
+    words = set(_WORD_RE.findall(text))
+    found = {_KW_TOKENS[w] for w in words & _KW_TOKENS.keys()}
+    hits = [h for h in HEADER_FIELDS if h in found]
     return len(hits), hits
 
 
+def write_page(src: fitz.Document, index: int, target: Path) -> bool:
+    """Write one page of the source PDF to target; log and return False on failure."""
+    try:
+        save_page(src, index, target)
+        return True
+    except Exception as e:
+        logger.error(f"❌ Failed to write page {target.name}: {e}")
+        return False
+
+
 # --------------------------------------
 # PROCESS ONE PDF
 # --------------------------------------
@@ -111,7 +123,7 @@ def process_single_pdf(pdf_path: Path) -> None:
 
     raw_subdir = raw_root / pdf_path.stem.replace(" ", "_").lower()
     error_subdir = error_root / pdf_path.stem.replace(" ", "_").lower()
-    ocr_text_dir = Path("logs/ocr_text") / pdf_path.stem.replace(" ", "_").lower()
+    ocr_text_dir = Path(OCR_TEXT_PATH) / pdf_path.stem.replace(" ", "_").lower()
 
     raw_subdir.mkdir(parents=True, exist_ok=True)
     error_subdir.mkdir(parents=True, exist_ok=True)
@@ -119,70 +131,92 @@ def process_single_pdf(pdf_path: Path) -> None:
     ARCHIVE_INPUT_PATH.mkdir(parents=True, exist_ok=True)
 
     # --------------------------
-    # 1. Split file into pages
+    # 1. Open source PDF
     # --------------------------
-    page_count = split_pdf_to_pages(pdf_path, raw_subdir)
-    if page_count == 0:
-        logger.error(f"❌ Skipping {pdf_path.name}: splitting failed or no pages.")
+    try:
+        src = fitz.open(str(pdf_path))
+    except Exception as e:
+        logger.error(f"❌ Skipping {pdf_path.name}: could not open PDF: {e}")
         return
 
-    kept = 0
-    discarded = 0
-
-    # --------------------------
-    # 2. Score each page
-    # --------------------------
-    page_pdfs = sorted(raw_subdir.glob("*.pdf"))
-    for page_pdf in page_pdfs:
-        logger.info("\n----------------------------------------")
-        logger.info(f"➡️ Evaluating page: {page_pdf.name}")
-
-        text = ocr_page_pdf(page_pdf)
+    with src:
+        page_count = src.page_count
+        if page_count == 0:
+            logger.error(f"❌ Skipping {pdf_path.name}: no pages.")
+            return
 
-        if not text.strip():
-            logger.warning(f"⚠️ Empty OCR text for {page_pdf.name}, moving to error.")
-            page_pdf.rename(error_subdir / page_pdf.name)
-            discarded += 1
-            continue
+        # Clean any existing page PDFs for this document to avoid stale files
+        clear_page_files(raw_subdir)
+        for f in ocr_text_dir.glob("*.txt"):
+            f.unlink(missing_ok=True)
 
-        score, hits = score_ocr_text(text)
-        logger.info(f"🔹 OCR HEADER HITS ({score}): {hits}")
+        kept = 0
+        discarded = 0
 
         # --------------------------
-        # KEEP PAGE
+        # 2. Score each page
         # --------------------------
-        if score >= THRESHOLD:
-            kept += 1
-
-            # Optional debug storage
-            if SAVE_OCR_DEBUG_TEXT:
-                txt_out = ocr_text_dir / f"{page_pdf.stem}.txt"
+        # OCR all pages in parallel straight from the source PDF; scoring
+        # and page writes stay serial below
+        logger.info(f"📝 OCR {page_count} page(s) with {OCR_WORKERS} worker(s)")
+        with ProcessPoolExecutor(max_workers=OCR_WORKERS) as ex:
+            texts = list(ex.map(ocr_pdf_page, repeat(pdf_path), range(page_count)))
+
+            kept_pages = []
+            for idx, text in enumerate(texts):
+                page_name = page_filename(pdf_path, idx)
+                logger.info("\n----------------------------------------")
+                logger.info(f"➡️ Evaluating page: {page_name}")
+
+                if not text.strip():
+                    logger.warning(f"⚠️ Empty OCR text for {page_name}, saving to error.")
+                    write_page(src, idx, error_subdir / page_name)
+                    discarded += 1
+                    continue
+
+                score, hits = score_ocr_text(text.lower())
+                logger.info(f"🔹 OCR HEADER HITS ({score}): {hits}")
+
+                # --------------------------
+                # KEEP PAGE
+                # --------------------------
+                if score >= THRESHOLD:
+                    kept += 1
+                    if write_page(src, idx, raw_subdir / page_name):
+                        kept_pages.append(idx)
+                        logger.info(f"✅ KEEP PAGE → saved to raw/{page_name}")
+
+                # --------------------------
+                # DISCARD PAGE
+                # --------------------------
+                else:
+                    discarded += 1
+                    if write_page(src, idx, error_subdir / page_name):
+                        logger.info(f"⏭ SKIP PAGE → saved to error/{page_name}")
+
+            # --------------------------
+            # 3. Cache extractor OCR text
+            # --------------------------
+            # Kept pages get the Gemini extractor's own OCR (preprocessed,
+            # single-block) while the pool is warm, so the extractor reads it
+            # from logs/ocr_text/ instead of re-OCRing raw/ pages
+            extract_texts = ex.map(extraction_ocr_pdf_page, repeat(pdf_path), kept_pages)
+            for idx, text in zip(kept_pages, extract_texts):
+                if not text.strip():
+                    continue  # let the extractor retry this page itself
+                txt_out = ocr_text_dir / f"{Path(page_filename(pdf_path, idx)).stem}.txt"
                 try:
                     with open(txt_out, "w", encoding="utf-8") as f:
                         f.write(text)
-                    logger.info(f"💾 OCR debug saved → {txt_out}")
+                    logger.info(f"💾 OCR text saved → {txt_out}")
                 except Exception as e:
                     logger.error(f"❌ Failed to save OCR text: {e}")
 
-            logger.info("✅ KEEP PAGE (remains in raw/)")
-
-        # --------------------------
-        # DISCARD PAGE
-        # --------------------------
-        else:
-            discarded += 1
-            target = error_subdir / page_pdf.name
-            try:
-                page_pdf.rename(target)
-                logger.info(f"⏭ SKIP PAGE → moved to error/{page_pdf.name}")
-            except Exception as e:
-                logger.error(f"❌ Failed to move page to error folder: {e}")
-
     logger.info("\n----------------------------------------")
     logger.info(f"📊 Summary for {pdf_path.name}: kept={kept}, discarded={discarded}")
 
     # --------------------------
-    # 3. Archive original PDF
+    # 4. Archive original PDF
     # --------------------------
     try:
         archived_target = ARCHIVE_INPUT_PATH / pdf_path.name
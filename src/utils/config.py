@@ -14,16 +14,22 @@ LOCAL_RAW_PATH = os.getenv("LOCAL_RAW_PATH", "data/raw")
 LOCAL_ERROR_PATH = os.getenv("LOCAL_ERROR_PATH", "data/error")
 LOCAL_PROCESSED_PATH = os.getenv("LOCAL_PROCESSED_PATH", "data/processed")
 LOG_PATH = os.getenv("LOG_PATH", "data/logs")
+OCR_TEXT_PATH = os.getenv("OCR_TEXT_PATH", "logs/ocr_text")  # per-page OCR text cache
 
-# Ensure all folders exist
-for path in [LOCAL_INPUT_PATH, LOCAL_RAW_PATH, LOCAL_ERROR_PATH, LOCAL_PROCESSED_PATH, LOG_PATH]:
-    Path(path).mkdir(parents=True, exist_ok=True)
+
+def ensure_paths():
+    """Create all data folders. Called once at pipeline start, not on import."""
+    for path in (LOCAL_INPUT_PATH, LOCAL_RAW_PATH, LOCAL_ERROR_PATH, LOCAL_PROCESSED_PATH, LOG_PATH, OCR_TEXT_PATH):
+        Path(path).mkdir(parents=True, exist_ok=True)
 
 
 # --- Gemini API Key ---
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 ENABLE_GEMINI = os.getenv("ENABLE_GEMINI", "false").lower() == "true"
-SAVE_OCR_DEBUG_TEXT = os.getenv("SAVE_OCR_DEBUG_TEXT", "false").lower() == "true"
+GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "4"))  # max in-flight Gemini requests
+
+# --- OCR parallelism (worker processes per document) ---
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", os.cpu_count() or 1))
 
 GOOGLE_SHEET_ID = os.getenv("GOOGLE_SHEET_ID", "")
 SERVICE_ACCOUNT_PATH = os.getenv("SERVICE_ACCOUNT_PATH", "credentials/service_account.json")
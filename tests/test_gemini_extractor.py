@@ -0,0 +1,62 @@
+# tests/test_gemini_extractor.py
+"""
+Unit tests for multi-document Gemini batching (no network: call_gemini is patched).
+
+Run:
+    python -m pytest -q
+"""
+
+import asyncio
+
+from src.extraction import gemini_extractor
+
+
+DOCS = [("a", "ocr text a"), ("b", "ocr text b")]
+
+
+def run_batch(monkeypatch, reply):
+    async def fake_call_gemini(client, prompt, label):
+        return reply
+
+    monkeypatch.setattr(gemini_extractor, "call_gemini", fake_call_gemini)
+    return asyncio.run(gemini_extractor.gemini_extract_batch(None, DOCS))
+
+
+def test_matches_documents_by_name(monkeypatch):
+    reply = {"docs": [
+        {"doc_name": "b", "storm_events": [{"state": "B"}]},
+        {"doc_name": "a", "storm_events": [{"state": "A"}]},
+    ]}
+    results = run_batch(monkeypatch, reply)
+
+    assert results == {
+        "a": {"storm_events": [{"state": "A"}]},
+        "b": {"storm_events": [{"state": "B"}]},
+    }
+
+
+def test_renamed_document_is_left_for_retry(monkeypatch):
+    # Gemini rewrote "a" → "A!!": it must not be paired with b's events
+    reply = {"docs": [
+        {"doc_name": "b", "storm_events": [{"state": "B"}]},
+        {"doc_name": "A!!", "storm_events": [{"state": "A"}]},
+    ]}
+    results = run_batch(monkeypatch, reply)
+
+    assert results == {"b": {"storm_events": [{"state": "B"}]}}
+
+
+def test_malformed_entries_are_skipped(monkeypatch):
+    reply = {"docs": [
+        "not an object",
+        {"doc_name": "a", "storm_events": "not a list"},
+        {"doc_name": "b", "storm_events": []},
+    ]}
+    results = run_batch(monkeypatch, reply)
+
+    assert results == {"b": {"storm_events": []}}
+
+
+def test_failed_call_returns_none(monkeypatch):
+    assert run_batch(monkeypatch, None) is None
+    assert run_batch(monkeypatch, {"storm_events": []}) is None